@@ -0,0 +1,128 @@
+from __future__ import annotations
+import asyncio
+import gzip
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from .config import (BACKUP_DIRNAME, BACKUP_INTERVAL_HOURS, BACKUP_PREWRITE_MIN_MINUTES,
+                     BACKUP_COMPRESS, BACKUP_PAGES_PER_STEP, BACKUP_KEEP)
+from .db import current_db_path, reset_db
+
+# serialise backup/restore work; re-entrant so before_write can hold it across backup_now
+_lock = threading.RLock()
+_last_prewrite: float = 0.0
+
+def backup_dir() -> Path:
+    db_path = current_db_path()
+    if db_path is None:
+        raise RuntimeError("DB engine not initialized; call init_db() in startup.")
+    folder = db_path.parent / BACKUP_DIRNAME
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+def _online_copy(src_path: Path, dst_path: Path) -> None:
+    """Copy src into dst with SQLite's online backup API, a page batch at a time.
+
+    The source read lock is released between batches, so writers keep going.
+    """
+    src = sqlite3.connect(str(src_path))
+    dst = sqlite3.connect(str(dst_path))
+    try:
+        with dst:
+            src.backup(dst, pages=BACKUP_PAGES_PER_STEP, sleep=0.005)
+    finally:
+        dst.close()
+        src.close()
+
+def list_backups() -> List[Path]:
+    """Newest first."""
+    files = [p for p in backup_dir().iterdir() if p.name.endswith((".sqlite", ".sqlite.gz"))]
+    return sorted(files, key=lambda p: p.name, reverse=True)
+
+def _kind(path: Path) -> str:
+    return path.name.split(".")[0].rsplit("-", 1)[-1]
+
+def rotate() -> None:
+    """Drop the oldest files of each kind beyond its BACKUP_KEEP allowance."""
+    seen: dict = {}
+    for path in list_backups():
+        kind = _kind(path)
+        seen[kind] = seen.get(kind, 0) + 1
+        if seen[kind] > BACKUP_KEEP.get(kind, 10):
+            path.unlink(missing_ok=True)
+
+def backup_now(kind: str = "manual", *, compress: Optional[bool] = None) -> Path:
+    """Take a point-in-time copy of the vault into <data folder>/backups/."""
+    compress = BACKUP_COMPRESS if compress is None else compress
+    with _lock:
+        db_path = current_db_path()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        target = backup_dir() / f"networth-{stamp}-{kind}.sqlite"
+        partial = target.with_name(target.name + ".part")
+        _online_copy(db_path, partial)
+        if compress:
+            gz_target = target.with_name(target.name + ".gz")
+            with open(partial, "rb") as fin, gzip.open(gz_target, "wb") as fout:
+                shutil.copyfileobj(fin, fout)
+            partial.unlink()
+            target = gz_target
+        else:
+            partial.rename(target)
+        rotate()
+    return target
+
+def before_write() -> Optional[Path]:
+    """Automatic pre-write backup, throttled to one per BACKUP_PREWRITE_MIN_MINUTES."""
+    global _last_prewrite
+    with _lock:
+        if _last_prewrite and time.monotonic() - _last_prewrite < BACKUP_PREWRITE_MIN_MINUTES * 60:
+            return None
+        try:
+            path = backup_now("prewrite")
+        except Exception as exc:
+            # never fail the user's write because the safety copy could not be made
+            print(f"⚠️  Pre-write backup failed: {exc}")
+            return None
+        _last_prewrite = time.monotonic()
+        return path
+
+def restore_backup(name: str) -> Path:
+    """Replace the live vault with a backup, then re-open it through reset_db()."""
+    # only finished backups are restorable (no .part/.restore leftovers, no traversal)
+    source = next((p for p in list_backups() if p.name == name), None)
+    if source is None:
+        raise FileNotFoundError(name)
+    backup_now("prerestore")
+    db_path = current_db_path()
+    with _lock:
+        if source.name.endswith(".gz"):
+            plain = source.with_name(source.name[:-3] + ".restore")
+            with gzip.open(source, "rb") as fin, open(plain, "wb") as fout:
+                shutil.copyfileobj(fin, fout)
+            try:
+                _online_copy(plain, db_path)
+            finally:
+                plain.unlink(missing_ok=True)
+        else:
+            _online_copy(source, db_path)
+        reset_db(db_path.parent, filename=db_path.name)
+    return db_path
+
+async def run_scheduler() -> None:
+    """Background task started from the app lifespan."""
+    if BACKUP_INTERVAL_HOURS <= 0:
+        return
+    interval = BACKUP_INTERVAL_HOURS * 3600
+    while True:
+        try:
+            last = next((p for p in list_backups() if _kind(p) == "scheduled"), None)
+            if last is None or time.time() - last.stat().st_mtime >= interval:
+                await asyncio.to_thread(backup_now, "scheduled")
+        except Exception as exc:
+            print(f"⚠️  Scheduled backup failed: {exc}")
+        await asyncio.sleep(min(interval, 3600))
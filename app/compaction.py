@@ -0,0 +1,143 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select, delete
+
+from . import db, search
+from .models import Snapshot, FXRate, Balance, InvestmentFlow
+
+# --- Tiered retention: full detail for recent months, one snapshot per period before ---
+
+FLOW_FIELDS = ["deposit", "withdrawal", "fees", "dividends_interest", "realized_pl"]
+
+@dataclass
+class CompactionReport:
+    cutoff: date
+    tier: str
+    kept_ids: List[int] = field(default_factory=list)
+    removed_ids: List[int] = field(default_factory=list)
+    balance_rows: int = 0
+    fx_rows: int = 0
+    flow_rows: int = 0
+    flows_merged: int = 0
+    snapshot_notes: int = 0     # notes on removed snapshots (dropped with them)
+    balance_notes: int = 0      # Balance.note rows on removed snapshots
+    bytes_before: Optional[int] = None
+    bytes_after: Optional[int] = None
+
+    @property
+    def bytes_reclaimed(self) -> Optional[int]:
+        if self.bytes_before is None or self.bytes_after is None:
+            return None
+        return self.bytes_before - self.bytes_after
+
+MAX_KEEP_MONTHS = 1200
+
+def _cutoff(today: date, keep_months: int, tier: str = "month") -> date:
+    """First day of the oldest fully-kept month, pulled back to a quarter start for tier="quarter"."""
+    months = today.year * 12 + (today.month - 1) - keep_months
+    y, m = divmod(months, 12)
+    if tier == "quarter":
+        m -= m % 3
+    return date(y, m + 1, 1)
+
+def _period(d: date, tier: str) -> Tuple[int, int]:
+    return (d.year, d.month) if tier == "month" else (d.year, (d.month - 1) // 3)
+
+def _disk_bytes() -> int:
+    """On-disk size of the vault: the main file plus its -wal (pages live there until checkpointed)."""
+    path = db.current_db_path()
+    return sum(p.stat().st_size for p in (path, path.with_name(path.name + "-wal")) if p.exists())
+
+def plan(s: Session, keep_months: int = 12, tier: str = "month",
+         today: Optional[date] = None) -> Tuple[CompactionReport, Dict[int, List[int]]]:
+    """Pick the period-end representative for every period older than the cutoff.
+
+    Returns the report (row counts filled in) and {representative_id: [dropped ids]}.
+    """
+    if tier not in ("month", "quarter"):
+        raise ValueError(f"Unknown tier: {tier}")
+    if not 0 <= keep_months <= MAX_KEEP_MONTHS:
+        raise ValueError(f"keep_months must be between 0 and {MAX_KEEP_MONTHS}")
+    cutoff = _cutoff(today or date.today(), keep_months, tier)
+    report = CompactionReport(cutoff=cutoff, tier=tier)
+
+    old = s.exec(select(Snapshot).where(Snapshot.snapshot_date < cutoff)
+                 .order_by(Snapshot.snapshot_date, Snapshot.id)).all()
+    periods: Dict[Tuple[int, int], List[Snapshot]] = {}
+    for snap in old:
+        periods.setdefault(_period(snap.snapshot_date, tier), []).append(snap)
+
+    groups: Dict[int, List[int]] = {}
+    for snaps in periods.values():
+        rep, dropped = snaps[-1], snaps[:-1]
+        report.kept_ids.append(rep.id)
+        if dropped:
+            groups[rep.id] = [d.id for d in dropped]
+            report.removed_ids.extend(groups[rep.id])
+
+    if report.removed_ids:
+        ids = report.removed_ids
+        report.balance_rows = s.exec(select(func.count()).select_from(Balance).where(Balance.snapshot_id.in_(ids))).one()
+        report.fx_rows = s.exec(select(func.count()).select_from(FXRate).where(FXRate.snapshot_id.in_(ids))).one()
+        report.flow_rows = s.exec(select(func.count()).select_from(InvestmentFlow).where(InvestmentFlow.snapshot_id.in_(ids))).one()
+        report.snapshot_notes = s.exec(select(func.count()).select_from(Snapshot)
+                                       .where(Snapshot.id.in_(ids), func.coalesce(Snapshot.notes, "") != "")).one()
+        report.balance_notes = s.exec(select(func.count()).select_from(Balance)
+                                      .where(Balance.snapshot_id.in_(ids), func.coalesce(Balance.note, "") != "")).one()
+    return report, groups
+
+def compact(keep_months: int = 12, tier: str = "month", *, preview: bool = True,
+            today: Optional[date] = None) -> CompactionReport:
+    """Collapse old periods to one snapshot each, folding dropped flows into the kept one.
+
+    Flows are "since previous snapshot", so summing each dropped snapshot's flows
+    into its period representative keeps every cumulative InvestmentFlow sum intact.
+    With preview=True nothing is written and only the read pool is used.
+    """
+    if preview:
+        with db.get_read_session() as s:
+            report, _ = plan(s, keep_months, tier, today)
+        report.bytes_before = _disk_bytes()
+        return report
+
+    with db.get_write_session() as s:
+        report, groups = plan(s, keep_months, tier, today)
+        report.bytes_before = _disk_bytes()
+        if not groups:
+            return report
+
+        for rep_id, dropped in groups.items():
+            totals = s.exec(
+                select(InvestmentFlow.account_id, *[func.sum(getattr(InvestmentFlow, f)) for f in FLOW_FIELDS])
+                .where(InvestmentFlow.snapshot_id.in_(dropped))
+                .group_by(InvestmentFlow.account_id)
+            ).all()
+            for account_id, *sums in totals:
+                values = dict(zip(FLOW_FIELDS, sums))
+                stmt = sqlite_insert(InvestmentFlow).values(snapshot_id=rep_id, account_id=account_id, **values)
+                s.exec(stmt.on_conflict_do_update(
+                    index_elements=["snapshot_id", "account_id"],
+                    set_={f: getattr(InvestmentFlow, f) + stmt.excluded[f] for f in FLOW_FIELDS},
+                ))
+                report.flows_merged += 1
+
+        ids = report.removed_ids
+        s.exec(delete(FXRate).where(FXRate.snapshot_id.in_(ids)))
+        s.exec(delete(Balance).where(Balance.snapshot_id.in_(ids)))
+        s.exec(delete(InvestmentFlow).where(InvestmentFlow.snapshot_id.in_(ids)))
+        s.exec(delete(Snapshot).where(Snapshot.id.in_(ids)))
+        search.remove_snapshots(s, ids)
+        s.commit()
+
+    # VACUUM cannot run inside a transaction. In WAL mode it writes the new pages
+    # to the -wal, so checkpoint them back and truncate the log to free the space.
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM")
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    report.bytes_after = _disk_bytes()
+    return report
@@ -1,4 +1,14 @@
 from pathlib import Path
+import os
 
 # Shared location for persisted settings
 CONFIG_FILE = Path.home() / ".networth_config.json"
+
+# --- Backups (overridable via env) ---
+BACKUP_DIRNAME = "backups"
+BACKUP_INTERVAL_HOURS = float(os.getenv("NETWORTH_BACKUP_INTERVAL_HOURS", "24"))   # 0 disables the schedule
+BACKUP_PREWRITE_MIN_MINUTES = float(os.getenv("NETWORTH_BACKUP_PREWRITE_MINUTES", "60"))
+BACKUP_COMPRESS = os.getenv("NETWORTH_BACKUP_COMPRESS", "0") == "1"
+BACKUP_PAGES_PER_STEP = 256
+# how many files to keep per backup kind
+BACKUP_KEEP = {"scheduled": 14, "prewrite": 10, "manual": 20, "prerestore": 5, "precompact": 5}
@@ -2,42 +2,88 @@ from __future__ import annotations
 from pathlib import Path
 from contextlib import contextmanager
 from typing import Optional
+import sqlite3
 
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
 from sqlmodel import SQLModel, Session, create_engine
 
-engine = None
+engine = None          # single writer connection; used for every mutation
+read_engine = None     # pool of mode=ro connections for analytic reads
 _db_path: Optional[Path] = None
 
 def _sqlite_url(db_path: Path) -> str:
     return f"sqlite:///{db_path.as_posix()}"
 
+def _on_write_connect(dbapi_conn, _record):
+    # WAL lets readers keep their snapshot while the writer commits
+    dbapi_conn.execute("PRAGMA journal_mode=WAL")
+    dbapi_conn.execute("PRAGMA busy_timeout=5000")
+
+def _on_read_connect(dbapi_conn, _record):
+    # take over transaction control from pysqlite so BEGIN happens in _on_read_begin
+    dbapi_conn.isolation_level = None
+
+def _on_read_begin(conn):
+    # one read transaction per session = one consistent WAL snapshot across all its queries
+    conn.exec_driver_sql("BEGIN")
+
+def _create_read_engine(db_path: Path):
+    uri = db_path.resolve().as_uri() + "?mode=ro"
+    ro = create_engine(
+        "sqlite://",
+        creator=lambda: sqlite3.connect(uri, uri=True, check_same_thread=False),
+        poolclass=QueuePool, pool_size=5, max_overflow=10,
+        echo=False,
+    )
+    event.listen(ro, "connect", _on_read_connect)
+    event.listen(ro, "begin", _on_read_begin)
+    return ro
+
 def init_db(data_folder: Optional[Path] = None, *, filename: str = "networth.sqlite") -> None:
     """Create or connect the DB at the given folder."""
-    global engine, _db_path
+    global engine, read_engine, _db_path
     if data_folder is None:
         data_folder = Path.cwd() / "data"
     data_folder.mkdir(parents=True, exist_ok=True)
     _db_path = data_folder / filename
-    engine = create_engine(_sqlite_url(_db_path), echo=False, connect_args={"check_same_thread": False})
+    engine = create_engine(
+        _sqlite_url(_db_path), echo=False,
+        connect_args={"check_same_thread": False},
+        pool_size=1, max_overflow=0,   # serialise writers in the pool instead of on SQLITE_BUSY
+    )
+    event.listen(engine, "connect", _on_write_connect)
     SQLModel.metadata.create_all(engine)
+    from .search import ensure_index
+    ensure_index(engine)
+    read_engine = _create_read_engine(_db_path)
 
 def reset_db(new_folder: Path, *, filename: str = "networth.sqlite") -> None:
     """Switch the engine to a new folder (Settings → Choose…)."""
     global engine
-    # dispose old engine (safe even if None)
-    try:
-        if engine is not None:
-            engine.dispose()
-    except Exception:
-        pass
+    # dispose old engines (safe even if None)
+    for eng in (read_engine, engine):
+        try:
+            if eng is not None:
+                eng.dispose()
+        except Exception:
+            pass
     init_db(new_folder, filename=filename)
 
 @contextmanager
-def get_session():
+def get_write_session():
     if engine is None:
         raise RuntimeError("DB engine not initialized; call init_db() in startup.")
     with Session(engine) as session:
         yield session
 
+@contextmanager
+def get_read_session():
+    """Read-only session on a consistent snapshot; never waits on the writer."""
+    if read_engine is None:
+        raise RuntimeError("DB engine not initialized; call init_db() in startup.")
+    with Session(read_engine, autoflush=False) as session:
+        yield session
+
 def current_db_path() -> Optional[Path]:
     return _db_path
@@ -0,0 +1,171 @@
+from __future__ import annotations
+import asyncio
+import json
+import signal
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlmodel import Session, select
+
+from .db import get_read_session
+from .models import Snapshot
+from .utils import compute_snapshot_networth, compute_12m_change
+
+# --- In-process change bus (vault writes -> SSE subscribers) ---
+
+class ChangeBus:
+    """Fan-out of change events to every open dashboard stream.
+
+    Write routes run in FastAPI's threadpool, subscribers live on the event
+    loop, so publishing hands each event over with call_soon_threadsafe.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self._lock = threading.Lock()
+        self._max_queue = max_queue
+        self._closed = False
+
+    def open(self) -> None:
+        self._closed = False
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._max_queue)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+            if self._closed:
+                queue.put_nowait(CLOSED)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers = {sub for sub in self._subscribers if sub[1] is not queue}
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # loop already closed; the stream cleans itself up
+                pass
+
+    def close(self) -> None:
+        """End every open stream (server shutdown / reload)."""
+        with self._lock:
+            self._closed = True
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer_close, queue)
+            except RuntimeError:
+                pass
+
+
+# sentinel telling a stream to finish
+CLOSED: Dict[str, Any] = {}
+# tells open dashboards to re-render from scratch
+RELOAD: Dict[str, Any] = {"reload": True}
+
+def _offer(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+    # a stalled client just misses events; it will resync on reload
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass
+
+
+def _offer_close(queue: asyncio.Queue) -> None:
+    # the sentinel must get through, so make room for it
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(CLOSED)
+
+
+bus = ChangeBus()
+
+
+def close_bus_on_exit_signals() -> None:
+    """Close the bus as soon as the server is told to stop.
+
+    uvicorn waits for open connections before running lifespan shutdown, so an
+    SSE stream would otherwise hold shutdown (and --reload) open forever. The
+    server's own SIGINT/SIGTERM handler is chained, not replaced.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        prev = signal.getsignal(sig)
+        if not callable(prev):
+            continue
+
+        def handler(signum, frame, prev=prev):
+            loop.call_soon_threadsafe(bus.close)
+            prev(signum, frame)
+
+        signal.signal(sig, handler)
+
+
+def format_sse(event: Dict[str, Any], name: str = "networth") -> str:
+    return f"event: {name}\ndata: {json.dumps(event)}\n\n"
+
+
+# --- Delta builders (called from write routes after commit) ---
+
+def _summary(session: Session) -> Optional[Dict[str, Any]]:
+    latest = session.exec(select(Snapshot).order_by(Snapshot.snapshot_date.desc())).first()
+    if not latest:
+        return None
+    current, delta_abs, delta_pct = compute_12m_change(session, latest.id)
+    return {"current": current, "delta_abs": delta_abs, "delta_pct": delta_pct, "base": latest.base_currency}
+
+
+def _build_delta(snapshot_ids: Iterable[int], removed: List[int]) -> Optional[Dict[str, Any]]:
+    points: List[Dict[str, Any]] = []
+    stale = False
+    with get_read_session() as session:
+        for sid in snapshot_ids:
+            snap = session.get(Snapshot, sid)
+            if not snap:
+                continue
+            try:
+                total, _ = compute_snapshot_networth(session, sid)
+            except ValueError:
+                # e.g. "Missing FX rate" after a currency change: let the page re-render
+                stale = True
+                continue
+            points.append({"id": snap.id, "date": snap.snapshot_date.isoformat(),
+                           "total": round(total, 2), "base": snap.base_currency})
+        if stale:
+            return RELOAD
+        if not points and not removed:
+            return None
+        try:
+            summary = _summary(session)
+        except ValueError:
+            return RELOAD
+    return {"points": points, "removed": removed, "summary": summary}
+
+
+def publish_snapshot_changes(snapshot_ids: Iterable[int] = (), removed_ids: Iterable[int] = ()) -> None:
+    """Push the changed points plus the refreshed 12-month change to the dashboard.
+
+    Call after the write session has closed: deltas are computed on the read
+    pool so the writer is not held. Skips all recomputation when nobody is listening.
+    Never raises: the write is already committed, so a delta that cannot be
+    built degrades to a reload event.
+    """
+    if not bus.has_subscribers():
+        return
+    try:
+        event = _build_delta(snapshot_ids, list(removed_ids))
+    except Exception as exc:
+        print(f"⚠️  Dashboard update failed: {exc}")
+        event = RELOAD
+    if event is not None:
+        bus.publish(event)
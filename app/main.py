@@ -1,13 +1,16 @@
 from pathlib import Path
 from contextlib import asynccontextmanager
 import os, json
+import asyncio
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 from .config import CONFIG_FILE           # <-- use shared module
 from .db import init_db
-from .routes import dashboard, accounts, snapshots
+from . import backup
+from .events import bus, close_bus_on_exit_signals
+from .routes import dashboard, accounts, snapshots, search
 from .routes import settings as settings_routes
 
 # Make CONFIG_FILE importable by settings.py
@@ -39,15 +42,20 @@ print(f"📁 Using data folder: {DATA_FOLDER}")
 async def lifespan(app: FastAPI):
     init_db(DATA_FOLDER)
     app.state.data_folder = DATA_FOLDER
-    from sqlmodel import Session, select
-    from .db import engine
+    from sqlmodel import select
+    from .db import get_write_session
     from .models import Category
-    with Session(engine) as s:
+    with get_write_session() as s:
         if not s.exec(select(Category)).first():
             for name in ["Liquidity", "Investments", "Properties", "Liabilities"]:
                 s.add(Category(name=name))
             s.commit()
+    scheduler = asyncio.create_task(backup.run_scheduler())
+    bus.open()
+    close_bus_on_exit_signals()
     yield
+    bus.close()
+    scheduler.cancel()
 
 def create_app() -> FastAPI:
     app = FastAPI(title="networth", version="0.1.0", lifespan=lifespan)
@@ -62,6 +70,7 @@ def create_app() -> FastAPI:
     app.include_router(dashboard.router)
     app.include_router(accounts.router)
     app.include_router(snapshots.router)
+    app.include_router(search.router)
     app.include_router(settings_routes.router)     # <-- add
 
     # optional shared filter
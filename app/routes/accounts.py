@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlmodel import select, delete
-from ..db import get_session
+from ..db import get_write_session, get_read_session
+from ..events import publish_snapshot_changes
+from .. import backup, search
 from ..models import Account, Category, Tag, AccountTag, Balance, InvestmentFlow
 from sqlalchemy import func, or_
 
@@ -9,7 +11,7 @@ router = APIRouter(prefix="/accounts")
 
 @router.get("/", response_class=HTMLResponse)
 def list_accounts(request: Request):
-    with get_session() as s:
+    with get_read_session() as s:
         accounts = s.exec(select(Account).order_by(Account.name)).all()
         cats = s.exec(select(Category)).all()
         cat_map = {c.id: c.name for c in cats}
@@ -37,7 +39,7 @@ def create_account(
     tags: str = Form(""),
     notes: str = Form("")
 ):
-    with get_session() as s:
+    with get_write_session() as s:
         acct = Account(name=name, category_id=category_id, currency_code=currency_code.upper(), notes=notes)
         s.add(acct)
         s.commit()
@@ -54,11 +56,12 @@ def create_account(
                     s.commit()
                     s.refresh(tag)
                 s.add(AccountTag(account_id=acct.id, tag_id=tag.id))
+        search.index_account(s, acct.id, notes)
         s.commit()
     return RedirectResponse(url="/accounts/", status_code=303)
 @router.post("/archive/{account_id}")
 def archive_account(account_id: int):
-    with get_session() as s:
+    with get_write_session() as s:
         acct = s.get(Account, account_id)
         if acct:
             acct.is_archived = True
@@ -69,7 +72,7 @@ def archive_account(account_id: int):
 
 @router.get("/edit/{account_id}", response_class=HTMLResponse)
 def edit_account(request: Request, account_id: int):
-    with get_session() as s:
+    with get_read_session() as s:
         acct = s.get(Account, account_id)
         if not acct:
             return RedirectResponse(url="/accounts/?error=Account+not+found", status_code=303)
@@ -98,11 +101,15 @@ def update_account(
     notes: str = Form(""),
     is_archived: str = Form("off"),
 ):
-    with get_session() as s:
+    backup.before_write()
+    with get_write_session() as s:
         acct = s.get(Account, account_id)
         if not acct:
             return RedirectResponse(url="/accounts/?error=Account+not+found", status_code=303)
 
+        # category/currency feed into every snapshot total that holds this account
+        affects_totals = (acct.category_id != int(category_id) or acct.currency_code != currency_code.upper())
+
         acct.name = name
         acct.category_id = int(category_id)
         acct.currency_code = currency_code.upper()
@@ -123,14 +130,20 @@ def update_account(
                     s.commit()
                     s.refresh(tag)
                 s.add(AccountTag(account_id=account_id, tag_id=tag.id))
+        search.index_account(s, account_id, notes)
         s.commit()
 
+        snap_ids = (s.exec(select(Balance.snapshot_id).where(Balance.account_id == account_id)).all()
+                    if affects_totals else [])
+
+    publish_snapshot_changes(snap_ids)
+
     return RedirectResponse(url="/accounts/", status_code=303)
 
 
 @router.post("/unarchive/{account_id}")
 def unarchive_account(account_id: int):
-    with get_session() as s:
+    with get_write_session() as s:
         acct = s.get(Account, account_id)
         if acct:
             acct.is_archived = False
@@ -141,7 +154,8 @@ def unarchive_account(account_id: int):
 
 @router.post("/delete/{account_id}")
 def delete_account(account_id: int):
-    with get_session() as s:
+    backup.before_write()
+    with get_write_session() as s:
         acct = s.get(Account, account_id)
         if not acct:
             return RedirectResponse(url="/accounts/?error=Account+not+found", status_code=303)
@@ -177,6 +191,8 @@ def delete_account(account_id: int):
         s.exec(delete(InvestmentFlow).where(InvestmentFlow.account_id == account_id))
         s.exec(delete(AccountTag).where(AccountTag.account_id == account_id))  # <-- remove tag links
 
+        search.remove_account(s, account_id)
+
         # finally delete the account
         s.delete(acct)
         s.commit()
@@ -1,15 +1,17 @@
+import asyncio
 from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from sqlmodel import select
-from ..db import get_session
+from ..db import get_read_session
+from ..events import CLOSED, bus, format_sse
 from ..models import Snapshot
-from ..utils import compute_snapshot_networth, find_snapshot_12m_prior
+from ..utils import compute_snapshot_networth, compute_12m_change
 
 router = APIRouter()
 
 @router.get("/", response_class=HTMLResponse)
 def dashboard(request: Request):
-    with get_session() as s:
+    with get_read_session() as s:
         snaps = s.exec(select(Snapshot).order_by(Snapshot.snapshot_date)).all()
         if not snaps:
             return request.app.state.templates.TemplateResponse("dashboard_empty.html", {"request": request})
@@ -17,16 +19,9 @@ def dashboard(request: Request):
         points = []
         for snap in snaps:
             total, _ = compute_snapshot_networth(s, snap.id)
-            points.append({"date": snap.snapshot_date.isoformat(), "total": round(total, 2), "base": snap.base_currency})
+            points.append({"id": snap.id, "date": snap.snapshot_date.isoformat(), "total": round(total, 2), "base": snap.base_currency})
         # Current and 12m change
-        current = points[-1]["total"]
-        prior_id = find_snapshot_12m_prior(s, snaps[-1].id)
-        delta_abs = delta_pct = None
-        if prior_id:
-            prior_total, _ = compute_snapshot_networth(s, prior_id)
-            delta_abs = round(current - prior_total, 2)
-            if prior_total != 0:
-                delta_pct = round(100.0 * (current - prior_total) / prior_total, 2)
+        current, delta_abs, delta_pct = compute_12m_change(s, snaps[-1].id, current=points[-1]["total"])
         return request.app.state.templates.TemplateResponse(
             "dashboard.html",
             {
@@ -38,3 +33,26 @@ def dashboard(request: Request):
                 "base": snaps[-1].base_currency,
             },
         )
+
+@router.get("/events")
+async def dashboard_events(request: Request):
+    """SSE stream of series deltas published by the write routes."""
+    queue = bus.subscribe()
+
+    async def stream():
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15.0)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is CLOSED:
+                    break
+                yield format_sse(event)
+        finally:
+            bus.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import HTMLResponse
+from ..db import get_read_session
+from ..search import search_notes
+
+router = APIRouter(prefix="/search")
+
+@router.get("/", response_class=HTMLResponse)
+def search_page(request: Request, q: str = ""):
+    hits = []
+    if q.strip():
+        with get_read_session() as s:
+            hits = search_notes(s, q)
+    return request.app.state.templates.TemplateResponse(
+        "search.html", {"request": request, "q": q, "hits": hits}
+    )
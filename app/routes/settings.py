@@ -1,19 +1,29 @@
 from pathlib import Path
 import json
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
 
 from ..db import reset_db, current_db_path
 from ..config import CONFIG_FILE          # <-- no more import from main
+from .. import backup, compaction
+from ..events import RELOAD, bus, publish_snapshot_changes
 
 router = APIRouter(prefix="/settings")
 
 @router.get("/", response_class=HTMLResponse)
 def settings_page(request: Request):
+    return _render(request)
+
+def _render(request: Request, **extra):
     cur = current_db_path()
+    backups = [
+        {"name": p.name, "size_kb": round(p.stat().st_size / 1024, 1)}
+        for p in (backup.list_backups() if cur else [])
+    ]
     return request.app.state.templates.TemplateResponse(
         "settings.html",
-        {"request": request, "data_folder": str(cur.parent) if cur else "—", "db_file": str(cur) if cur else "—"},
+        {"request": request, "data_folder": str(cur.parent) if cur else "—", "db_file": str(cur) if cur else "—",
+         "backups": backups, **extra},
     )
 
 @router.post("/choose")
@@ -37,3 +47,39 @@ def choose_data_folder():
     reset_db(folder)
 
     return RedirectResponse(url="/settings/?msg=Folder+set+to+" + str(folder).replace(" ", "+"), status_code=303)
+
+
+@router.post("/backup")
+def backup_vault(compress: str = Form("off")):
+    path = backup.backup_now("manual", compress=(compress == "on"))
+    return RedirectResponse(url="/settings/?msg=Backup+saved:+" + path.name, status_code=303)
+
+@router.post("/restore")
+def restore_vault(name: str = Form(...)):
+    try:
+        backup.restore_backup(name)
+    except FileNotFoundError:
+        return RedirectResponse(url="/settings/?msg=Backup+not+found", status_code=303)
+    # the whole series changed; open dashboards re-render
+    bus.publish(RELOAD)
+    return RedirectResponse(url="/settings/?msg=Restored+" + name, status_code=303)
+
+@router.post("/compact", response_class=HTMLResponse)
+def compact_history(
+    request: Request,
+    keep_months: int = Form(12),
+    tier: str = Form("month"),
+    action: str = Form("preview"),
+):
+    apply = action == "apply"
+    if tier not in ("month", "quarter") or not 0 <= keep_months <= compaction.MAX_KEEP_MONTHS:
+        return RedirectResponse(
+            url=f"/settings/?msg=Keep+months+must+be+0-{compaction.MAX_KEEP_MONTHS}+and+tier+month+or+quarter",
+            status_code=303,
+        )
+    if apply:
+        backup.backup_now("precompact")
+    report = compaction.compact(keep_months, tier, preview=not apply)
+    if apply and report.removed_ids:
+        publish_snapshot_changes(removed_ids=report.removed_ids)
+    return _render(request, compaction=report, applied=apply, keep_months=keep_months, tier=tier)
@@ -1,9 +1,15 @@
+import asyncio
 from typing import Dict, List
 from fastapi import APIRouter, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlmodel import select, delete  # <-- delete added
-from datetime import date
-from ..db import get_session
+from sqlalchemy import insert, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import date, datetime
+from urllib.parse import quote_plus
+from ..db import get_write_session, get_read_session
+from ..events import publish_snapshot_changes
+from .. import backup, search
 from ..models import Snapshot, FXRate, Account, Category, Balance, InvestmentFlow
 from ..utils import compute_snapshot_networth
 
@@ -11,18 +17,20 @@ router = APIRouter(prefix="/snapshots")
 
 @router.get("/", response_class=HTMLResponse)
 def list_snapshots(request: Request):
-    with get_session() as s:
+    with get_read_session() as s:
         snaps = s.exec(select(Snapshot).order_by(Snapshot.snapshot_date)).all()
         enriched = []
         for snap in snaps:
             total, _ = compute_snapshot_networth(s, snap.id) if snap else (0.0, {})
             enriched.append({"snap": snap, "total": total})
-    return request.app.state.templates.TemplateResponse("snapshots.html", {"request": request, "snaps": enriched})
+    error = request.query_params.get("error")
+    return request.app.state.templates.TemplateResponse("snapshots.html", {"request": request, "snaps": enriched,
+                                                                         "error": error})
 
 @router.get("/new", response_class=HTMLResponse)
 def new_snapshot(request: Request):
     from datetime import date
-    with get_session() as s:
+    with get_read_session() as s:
         accounts = s.exec(
             select(Account).where(Account.is_archived == False).order_by(Account.name)
         ).all()
@@ -55,6 +63,26 @@ def new_snapshot(request: Request):
         },
     )
 
+FLOW_PREFIXES = {"dep_": "deposit", "wd_": "withdrawal", "fee_": "fees",
+                 "div_": "dividends_interest", "pl_": "realized_pl"}
+
+def _parse_items(form):
+    """Split posted fields into (fx, balances, flows); absent fields stay absent."""
+    fx_items: Dict[str, float] = {}
+    balance_items: Dict[int, float] = {}
+    flow_items: Dict[int, Dict[str, float]] = {}
+    for k, v in form.items():
+        if k.startswith("fx_"):
+            fx_items[k[3:].upper()] = float(v) if v else 0.0
+        elif k.startswith("bal_"):
+            balance_items[int(k[4:])] = float(v) if v else 0.0
+        else:
+            for prefix, field in FLOW_PREFIXES.items():
+                if k.startswith(prefix):
+                    flow_items.setdefault(int(k[len(prefix):]), {})[field] = float(v) if v else 0.0
+                    break
+    return fx_items, balance_items, flow_items
+
 @router.post("/create")
 async def create_snapshot(
     request: Request,
@@ -63,40 +91,18 @@ async def create_snapshot(
     notes: str = Form(""),
 ):
     form = await request.form()
+    fx_items, balance_items, flow_items = _parse_items(form)
+    # DB work off the event loop: the writer pool has one connection and may be busy
+    snap_id = await asyncio.to_thread(_insert_snapshot, snapshot_date, base_currency, notes,
+                                      fx_items, balance_items, flow_items)
+    await asyncio.to_thread(publish_snapshot_changes, [snap_id])
+    return RedirectResponse(url="/snapshots/", status_code=303)
 
-    fx_items: Dict[str, float] = {}
-    balance_items: Dict[int, float] = {}
-    flow_items: Dict[int, Dict[str, float]] = {}
-
-    for k, v in form.items():
-        if k.startswith("fx_"):
-            cur = k[3:].upper()
-            fx_items[cur] = float(v) if v else 0.0
-        elif k.startswith("bal_"):
-            aid = int(k[4:])
-            balance_items[aid] = float(v) if v else 0.0
-        elif k.startswith("dep_"):
-            aid = int(k[4:])
-            flow_items.setdefault(aid, {})["deposit"] = float(v) if v else 0.0
-        elif k.startswith("wd_"):
-            aid = int(k[3:])
-            flow_items.setdefault(aid, {})["withdrawal"] = float(v) if v else 0.0
-        elif k.startswith("fee_"):
-            aid = int(k[4:])
-            flow_items.setdefault(aid, {})["fees"] = float(v) if v else 0.0
-        elif k.startswith("div_"):
-            aid = int(k[4:])
-            flow_items.setdefault(aid, {})["dividends_interest"] = float(v) if v else 0.0
-        elif k.startswith("pl_"):
-            aid = int(k[3:])
-            flow_items.setdefault(aid, {})["realized_pl"] = float(v) if v else 0.0
-
-    from datetime import date as _date
-    from ..db import get_session
-    from ..models import Snapshot, FXRate, Balance, InvestmentFlow
-
-    with get_session() as s:
-        snap = Snapshot(snapshot_date=_date.fromisoformat(snapshot_date),
+def _insert_snapshot(snapshot_date: str, base_currency: str, notes: str,
+                     fx_items: Dict[str, float], balance_items: Dict[int, float],
+                     flow_items: Dict[int, Dict[str, float]]) -> int:
+    with get_write_session() as s:
+        snap = Snapshot(snapshot_date=date.fromisoformat(snapshot_date),
                         base_currency=base_currency.upper(),
                         notes=notes)
         s.add(snap)
@@ -127,13 +133,64 @@ async def create_snapshot(
                                  fees=flows.get("fees", 0.0),
                                  dividends_interest=flows.get("dividends_interest", 0.0),
                                  realized_pl=flows.get("realized_pl", 0.0)))
+        search.index_snapshot(s, snap.id)
+        s.commit()
+        return snap.id
+
+def _copy_rows(s, model, columns: List[str], src_id: int, dst_id: int, *, active_only: bool = False) -> int:
+    """INSERT ... SELECT the child rows of one snapshot under another, inside SQLite.
+
+    active_only skips rows of archived accounts, matching what /snapshots/new offers.
+    """
+    cols = [getattr(model, c) for c in columns]
+    rows = select(literal(dst_id), *cols).where(model.snapshot_id == src_id)
+    if active_only:
+        rows = rows.join(Account, Account.id == model.account_id).where(Account.is_archived == False)
+    stmt = insert(model).from_select(["snapshot_id", *columns], rows)
+    return s.exec(stmt).rowcount
+
+def _error_redirect(url: str, message: str) -> RedirectResponse:
+    sep = "&" if "?" in url else "?"
+    return RedirectResponse(url=f"{url}{sep}error={quote_plus(message)}", status_code=303)
+
+@router.post("/clone")
+def clone_snapshot(
+    snapshot_date: str = Form(...),
+    notes: str = Form(""),
+    include_flows: str = Form("off"),
+):
+    """Copy the latest snapshot forward to a new date; the user then patches only what changed."""
+    try:
+        new_date = date.fromisoformat(snapshot_date)
+    except ValueError:
+        return _error_redirect("/snapshots/", f"Invalid snapshot date: {snapshot_date}")
+    with get_write_session() as s:
+        src = s.exec(select(Snapshot).order_by(Snapshot.snapshot_date.desc())).first()
+        if not src:
+            return RedirectResponse(url="/snapshots/new", status_code=303)
+
+        snap = Snapshot(snapshot_date=new_date,
+                        base_currency=src.base_currency,
+                        notes=notes)
+        s.add(snap)
+        s.flush()
+
+        _copy_rows(s, FXRate, ["currency_code", "rate_to_base"], src.id, snap.id)
+        _copy_rows(s, Balance, ["account_id", "native_balance", "note"], src.id, snap.id, active_only=True)
+        if include_flows == "on":
+            _copy_rows(s, InvestmentFlow,
+                       ["account_id", "deposit", "withdrawal", "fees", "dividends_interest", "realized_pl"],
+                       src.id, snap.id, active_only=True)
+        search.index_snapshot(s, snap.id)
         s.commit()
+        snap_id = snap.id
 
-    return RedirectResponse(url="/snapshots/", status_code=303)
+    publish_snapshot_changes([snap_id])
+    return RedirectResponse(url=f"/snapshots/{snap_id}/edit?partial=1", status_code=303)
 
 @router.get("/{snapshot_id}/edit", response_class=HTMLResponse)
 def edit_snapshot(request: Request, snapshot_id: int):
-    with get_session() as s:
+    with get_read_session() as s:
         snap = s.get(Snapshot, snapshot_id)
         if not snap:
             return RedirectResponse(url="/snapshots/", status_code=303)
@@ -170,6 +227,7 @@ def edit_snapshot(request: Request, snapshot_id: int):
             "prefill_bal": prefill_bal,
             "prefill_flow": prefill_flow,
             "inv_category_id": inv_category_id,   # <-- pass it
+            "error": request.query_params.get("error"),
         },
     )
 
@@ -184,29 +242,20 @@ async def update_snapshot(
     notes: str = Form(""),
 ):
     form = await request.form()
+    fx_items, balance_items, flow_items = _parse_items(form)
+    if await asyncio.to_thread(_replace_snapshot, snapshot_id, snapshot_date, base_currency, notes,
+                               fx_items, balance_items, flow_items):
+        await asyncio.to_thread(publish_snapshot_changes, [snapshot_id])
+    return RedirectResponse(url="/snapshots/", status_code=303)
 
-    fx_items, balance_items, flow_items = {}, {}, {}
-
-    for k, v in form.items():
-        if k.startswith("fx_"):
-            fx_items[k[3:].upper()] = float(v) if v else 0.0
-        elif k.startswith("bal_"):
-            balance_items[int(k[4:])] = float(v) if v else 0.0
-        elif k.startswith("dep_"):
-            aid = int(k[4:]); flow_items.setdefault(aid, {})["deposit"] = float(v) if v else 0.0
-        elif k.startswith("wd_"):
-            aid = int(k[3:]); flow_items.setdefault(aid, {})["withdrawal"] = float(v) if v else 0.0
-        elif k.startswith("fee_"):
-            aid = int(k[4:]); flow_items.setdefault(aid, {})["fees"] = float(v) if v else 0.0
-        elif k.startswith("div_"):
-            aid = int(k[4:]); flow_items.setdefault(aid, {})["dividends_interest"] = float(v) if v else 0.0
-        elif k.startswith("pl_"):
-            aid = int(k[3:]); flow_items.setdefault(aid, {})["realized_pl"] = float(v) if v else 0.0
-
-    with get_session() as s:
+def _replace_snapshot(snapshot_id: int, snapshot_date: str, base_currency: str, notes: str,
+                      fx_items: Dict[str, float], balance_items: Dict[int, float],
+                      flow_items: Dict[int, Dict[str, float]]) -> bool:
+    backup.before_write()
+    with get_write_session() as s:
         snap = s.get(Snapshot, snapshot_id)
         if not snap:
-            return RedirectResponse(url="/snapshots/", status_code=303)
+            return False
 
         # update meta
         snap.snapshot_date = date.fromisoformat(snapshot_date)
@@ -248,19 +297,77 @@ async def update_snapshot(
                                 fees=flows.get("fees", 0.0),
                                 dividends_interest=flows.get("dividends_interest", 0.0),
                                 realized_pl=flows.get("realized_pl", 0.0)))
+        search.index_snapshot(s, snapshot_id)
         s.commit()
+    return True
 
-
+@router.post("/{snapshot_id}/patch")
+async def patch_snapshot(snapshot_id: int, request: Request):
+    """Partial update: only the posted fields are written, everything else is left as-is."""
+    form = await request.form()
+    meta = {k: form[k] for k in ("snapshot_date", "base_currency", "notes") if k in form}
+    try:
+        fx_items, balance_items, flow_items = _parse_items(form)
+        changed = await asyncio.to_thread(_upsert_snapshot, snapshot_id, meta, fx_items, balance_items, flow_items)
+    except ValueError as exc:
+        # nothing was committed; send the user back to the same partial edit
+        return _error_redirect(f"/snapshots/{snapshot_id}/edit?partial=1", str(exc))
+    if changed:
+        await asyncio.to_thread(publish_snapshot_changes, [snapshot_id])
     return RedirectResponse(url="/snapshots/", status_code=303)
 
+def _upsert_snapshot(snapshot_id: int, meta: Dict[str, str],
+                     fx_items: Dict[str, float], balance_items: Dict[int, float],
+                     flow_items: Dict[int, Dict[str, float]]) -> bool:
+    backup.before_write()
+    with get_write_session() as s:
+        snap = s.get(Snapshot, snapshot_id)
+        if not snap:
+            return False
+
+        if meta.get("snapshot_date"):
+            snap.snapshot_date = date.fromisoformat(meta["snapshot_date"])
+        if meta.get("base_currency"):
+            snap.base_currency = meta["base_currency"].upper()
+            fx_items[snap.base_currency] = 1.0
+        if "notes" in meta:
+            snap.notes = meta["notes"]
+        snap.updated_at = datetime.utcnow()
+        s.add(snap)
+
+        for cur, rate in fx_items.items():
+            if rate <= 0:
+                raise ValueError(f"FX rate for {cur} must be > 0")
+            stmt = sqlite_insert(FXRate).values(snapshot_id=snapshot_id, currency_code=cur, rate_to_base=rate)
+            s.exec(stmt.on_conflict_do_update(index_elements=["snapshot_id", "currency_code"],
+                                              set_={"rate_to_base": rate}))
+
+        for account_id, native_balance in balance_items.items():
+            stmt = sqlite_insert(Balance).values(snapshot_id=snapshot_id, account_id=account_id,
+                                                 native_balance=native_balance)
+            s.exec(stmt.on_conflict_do_update(index_elements=["snapshot_id", "account_id"],
+                                              set_={"native_balance": native_balance}))
+
+        for account_id, flows in flow_items.items():
+            row = {field: 0.0 for field in FLOW_PREFIXES.values()} | flows
+            stmt = sqlite_insert(InvestmentFlow).values(snapshot_id=snapshot_id, account_id=account_id, **row)
+            s.exec(stmt.on_conflict_do_update(index_elements=["snapshot_id", "account_id"], set_=flows))
+
+        search.index_snapshot(s, snapshot_id)
+        s.commit()
+    return True
+
 @router.post("/{snapshot_id}/delete")
 def delete_snapshot(snapshot_id: int):
-    with get_session() as s:
+    backup.before_write()
+    with get_write_session() as s:
         if not s.get(Snapshot, snapshot_id):
             return RedirectResponse(url="/snapshots/", status_code=303)
         s.exec(delete(FXRate).where(FXRate.snapshot_id == snapshot_id))
         s.exec(delete(Balance).where(Balance.snapshot_id == snapshot_id))
         s.exec(delete(InvestmentFlow).where(InvestmentFlow.snapshot_id == snapshot_id))
         s.exec(delete(Snapshot).where(Snapshot.id == snapshot_id))
+        search.remove_snapshot(s, snapshot_id)
         s.commit()
+    publish_snapshot_changes(removed_ids=[snapshot_id])
     return RedirectResponse(url="/snapshots/", status_code=303)
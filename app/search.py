@@ -0,0 +1,126 @@
+from __future__ import annotations
+import re
+from typing import Any, Dict, List
+
+from markupsafe import Markup, escape
+from sqlalchemy import bindparam, text
+from sqlmodel import Session
+
+# --- FTS5 index over Account.notes, Snapshot.notes and Balance.note ---
+# note_index holds one row per note with regular, indexed link columns
+# (kind in {"account", "snapshot", "balance"}). notes_fts is an external-content
+# FTS5 table over its body, kept in step by triggers, so every sync below is an
+# indexed DELETE/INSERT on note_index plus rowid-level FTS updates.
+
+INDEX_TABLE = "note_index"
+FTS_TABLE = "notes_fts"
+
+_CREATE = [
+    f"""CREATE TABLE {INDEX_TABLE} (
+        id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        account_id INTEGER,
+        snapshot_id INTEGER,
+        body TEXT NOT NULL
+    )""",
+    f"CREATE INDEX ix_{INDEX_TABLE}_account ON {INDEX_TABLE} (account_id)",
+    f"CREATE INDEX ix_{INDEX_TABLE}_snapshot ON {INDEX_TABLE} (snapshot_id)",
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        body, content = '{INDEX_TABLE}', content_rowid = 'id',
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {INDEX_TABLE}_ai AFTER INSERT ON {INDEX_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, body) VALUES (new.id, new.body);
+    END""",
+    f"""CREATE TRIGGER {INDEX_TABLE}_ad AFTER DELETE ON {INDEX_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body);
+    END""",
+]
+
+_INSERT = f"INSERT INTO {INDEX_TABLE} (kind, account_id, snapshot_id, body) VALUES (:kind, :aid, :sid, :body)"
+
+def ensure_index(engine) -> None:
+    """Create the index tables if missing and backfill them from existing notes."""
+    with Session(engine) as s:
+        exists = s.exec(text("SELECT 1 FROM sqlite_master WHERE name = :n").bindparams(n=INDEX_TABLE)).first()
+        if not exists:
+            for stmt in _CREATE:
+                s.exec(text(stmt))
+            rebuild_index(s)
+            s.commit()
+
+def rebuild_index(s: Session) -> None:
+    s.exec(text(f"DELETE FROM {INDEX_TABLE}"))
+    s.exec(text(f"""
+        INSERT INTO {INDEX_TABLE} (kind, account_id, snapshot_id, body)
+        SELECT 'account', id, NULL, notes FROM account WHERE coalesce(notes, '') <> ''
+        UNION ALL
+        SELECT 'snapshot', NULL, id, notes FROM snapshot WHERE coalesce(notes, '') <> ''
+        UNION ALL
+        SELECT 'balance', account_id, snapshot_id, note FROM balance WHERE coalesce(note, '') <> ''
+    """))
+
+# Sync helpers: call inside the route's session before its final commit.
+
+def index_account(s: Session, account_id: int, notes: str | None) -> None:
+    s.exec(text(f"DELETE FROM {INDEX_TABLE} WHERE account_id = :aid AND kind = 'account'").bindparams(aid=account_id))
+    if notes and notes.strip():
+        s.exec(text(_INSERT).bindparams(kind="account", aid=account_id, sid=None, body=notes))
+
+def index_snapshot(s: Session, snapshot_id: int) -> None:
+    """Re-index a snapshot's own notes and all of its balance notes."""
+    s.flush()   # raw SQL below does not autoflush pending ORM changes
+    remove_snapshot(s, snapshot_id)
+    s.exec(text(f"""
+        INSERT INTO {INDEX_TABLE} (kind, account_id, snapshot_id, body)
+        SELECT 'snapshot', NULL, id, notes FROM snapshot WHERE id = :sid AND coalesce(notes, '') <> ''
+        UNION ALL
+        SELECT 'balance', account_id, snapshot_id, note FROM balance WHERE snapshot_id = :sid AND coalesce(note, '') <> ''
+    """).bindparams(sid=snapshot_id))
+
+def remove_account(s: Session, account_id: int) -> None:
+    s.exec(text(f"DELETE FROM {INDEX_TABLE} WHERE account_id = :aid").bindparams(aid=account_id))
+
+def remove_snapshot(s: Session, snapshot_id: int) -> None:
+    s.exec(text(f"DELETE FROM {INDEX_TABLE} WHERE snapshot_id = :sid").bindparams(sid=snapshot_id))
+
+def remove_snapshots(s: Session, snapshot_ids: List[int]) -> None:
+    """Bulk variant of remove_snapshot: one statement for the whole batch."""
+    if snapshot_ids:
+        stmt = text(f"DELETE FROM {INDEX_TABLE} WHERE snapshot_id IN :sids")
+        s.exec(stmt.bindparams(bindparam("sids", expanding=True)).bindparams(sids=list(snapshot_ids)))
+
+def _to_match(query: str) -> str:
+    """Turn free text into a safe FTS5 expression: every word as a quoted prefix term."""
+    words = re.findall(r"\w+", query, flags=re.UNICODE)
+    return " ".join(f'"{w}"*' for w in words)
+
+def search_notes(s: Session, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+    """Ranked (bm25) hits with a highlighted snippet and the page to open."""
+    match = _to_match(query)
+    if not match:
+        return []
+    rows = s.exec(text(f"""
+        SELECT n.kind, n.account_id, n.snapshot_id,
+               snippet({FTS_TABLE}, 0, char(2), char(3), '…', 12) AS snip,
+               a.name AS account_name, sn.snapshot_date AS snapshot_date
+        FROM {FTS_TABLE} AS f
+        JOIN {INDEX_TABLE} AS n ON n.id = f.rowid
+        LEFT JOIN account AS a ON a.id = n.account_id
+        LEFT JOIN snapshot AS sn ON sn.id = n.snapshot_id
+        WHERE {FTS_TABLE} MATCH :q
+        ORDER BY f.rank
+        LIMIT :limit
+    """).bindparams(q=match, limit=limit)).all()
+
+    hits = []
+    for kind, aid, sid, snip, account_name, snapshot_date in rows:
+        if kind == "account":
+            url, title = f"/accounts/edit/{aid}", account_name
+        elif kind == "snapshot":
+            url, title = f"/snapshots/{sid}/edit", f"Snapshot {snapshot_date}"
+        else:
+            url, title = f"/snapshots/{sid}/edit", f"{account_name} @ {snapshot_date}"
+        snippet = Markup(str(escape(snip)).replace("\x02", "<mark>").replace("\x03", "</mark>"))
+        hits.append({"kind": kind, "url": url, "title": title, "snippet": snippet})
+    return hits
@@ -55,3 +55,17 @@ def find_snapshot_12m_prior(session: Session, snapshot_id: int) -> Optional[int]
             (s.snapshot_date.year == target_year and s.snapshot_date.month <= target_month)):
             candidate = s
     return candidate.id if candidate else None
+
+def compute_12m_change(session: Session, snapshot_id: int, current: Optional[float] = None) -> Tuple[float, Optional[float], Optional[float]]:
+    """Return (current_total, delta_abs, delta_pct) against the snapshot ~12 months before."""
+    if current is None:
+        current, _ = compute_snapshot_networth(session, snapshot_id)
+        current = round(current, 2)
+    delta_abs = delta_pct = None
+    prior_id = find_snapshot_12m_prior(session, snapshot_id)
+    if prior_id:
+        prior_total, _ = compute_snapshot_networth(session, prior_id)
+        delta_abs = round(current - prior_total, 2)
+        if prior_total != 0:
+            delta_pct = round(100.0 * (current - prior_total) / prior_total, 2)
+    return current, delta_abs, delta_pct
@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+# must be set before app.main / app.config are imported
+os.environ.setdefault("NETWORTH_DATA_DIR", tempfile.mkdtemp(prefix="networth-tests-"))
+os.environ["NETWORTH_BACKUP_INTERVAL_HOURS"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from app import db
+from app import main as app_main
+from app.models import Balance, FXRate, InvestmentFlow, Snapshot
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """App on a fresh vault in tmp_path (lifespan seeds the categories)."""
+    monkeypatch.setattr(app_main, "DATA_FOLDER", tmp_path)
+    with TestClient(app_main.create_app(), follow_redirects=False) as c:
+        yield c
+    for eng in (db.read_engine, db.engine):
+        eng.dispose()
+
+
+@pytest.fixture
+def rows():
+    """Read back the child rows of a snapshot as plain tuples."""
+    def _rows(snapshot_id):
+        with db.get_read_session() as s:
+            fx = {r.currency_code: r.rate_to_base
+                  for r in s.exec(select(FXRate).where(FXRate.snapshot_id == snapshot_id)).all()}
+            bal = {r.account_id: r.native_balance
+                   for r in s.exec(select(Balance).where(Balance.snapshot_id == snapshot_id)).all()}
+            flows = {r.account_id: (r.deposit, r.withdrawal, r.fees, r.dividends_interest, r.realized_pl)
+                     for r in s.exec(select(InvestmentFlow).where(InvestmentFlow.snapshot_id == snapshot_id)).all()}
+        return fx, bal, flows
+    return _rows
+
+
+def add_account(client, name, category_id, currency):
+    client.post("/accounts/create", data={"name": name, "category_id": category_id, "currency_code": currency})
+
+
+def add_snapshot(client, snapshot_date, **fields):
+    data = {"snapshot_date": snapshot_date, "base_currency": "AUD", **fields}
+    assert client.post("/snapshots/create", data=data).status_code == 303
+
+
+def snapshot_ids():
+    with db.get_read_session() as s:
+        return [snap.id for snap in s.exec(select(Snapshot).order_by(Snapshot.snapshot_date)).all()]
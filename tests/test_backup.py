@@ -0,0 +1,40 @@
+from app import backup
+from conftest import add_account, add_snapshot, snapshot_ids
+
+
+def test_failed_prewrite_backup_does_not_block_the_write(client, monkeypatch):
+    add_account(client, "Bank", 1, "AUD")
+    add_snapshot(client, "2025-01-31", bal_1="100")
+    monkeypatch.setattr(backup, "_last_prewrite", 0.0)
+
+    def boom(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(backup, "backup_now", boom)
+
+    (sid,) = snapshot_ids()
+    assert client.post(f"/snapshots/{sid}/delete").status_code == 303
+    assert snapshot_ids() == []
+    assert backup._last_prewrite == 0.0      # next write retries
+
+
+def test_restore_round_trip(client):
+    add_account(client, "Bank", 1, "AUD")
+    add_snapshot(client, "2025-01-31", bal_1="100")
+    saved = backup.backup_now("manual", compress=True)
+    add_snapshot(client, "2025-02-28", bal_1="200")
+    assert len(snapshot_ids()) == 2
+
+    assert client.post("/settings/restore", data={"name": saved.name}).status_code == 303
+    assert len(snapshot_ids()) == 1
+
+
+def test_restore_rejects_files_outside_the_backup_list(client):
+    add_account(client, "Bank", 1, "AUD")
+    add_snapshot(client, "2025-01-31", bal_1="100")
+    leftover = backup.backup_dir() / "networth-20250101-000000-000000-manual.sqlite.part"
+    leftover.write_bytes(b"")
+
+    for name in (leftover.name, "../networth.sqlite"):
+        resp = client.post("/settings/restore", data={"name": name})
+        assert resp.headers["location"] == "/settings/?msg=Backup+not+found"
+    assert len(snapshot_ids()) == 1
@@ -0,0 +1,86 @@
+from datetime import date
+
+import pytest
+from sqlmodel import func, select
+
+from app import compaction, db
+from app.models import Balance, InvestmentFlow
+from conftest import add_account, add_snapshot, snapshot_ids
+
+TODAY = date(2026, 10, 19)
+
+
+def _flow_sums():
+    fields = [getattr(InvestmentFlow, f) for f in compaction.FLOW_FIELDS]
+    with db.get_read_session() as s:
+        rows = s.exec(select(InvestmentFlow.account_id, *[func.sum(f) for f in fields])
+                      .group_by(InvestmentFlow.account_id)).all()
+    return {r[0]: tuple(r[1:]) for r in rows}
+
+
+def _disk_bytes():
+    path = db.current_db_path()
+    wal = path.with_name(path.name + "-wal")
+    return path.stat().st_size + (wal.stat().st_size if wal.exists() else 0)
+
+
+@pytest.fixture
+def weekly(client):
+    add_account(client, "Fund", 2, "AUD")
+    add_account(client, "Broker", 2, "AUD")
+    dates = ["2024-01-05", "2024-01-12", "2024-01-19", "2024-02-02", "2024-02-09",
+             "2024-03-01", "2024-04-05", "2026-10-01", "2026-10-08"]
+    for i, d in enumerate(dates):
+        fields = {"bal_1": "100", "dep_1": "10", "fee_1": "1", "bal_2": "50"}
+        if i % 2:
+            fields |= {"dep_2": "3", "div_2": "0.5"}
+        add_snapshot(client, d, **fields)
+    return dates
+
+
+def test_preview_writes_nothing(weekly):
+    before = (snapshot_ids(), _flow_sums())
+    report = compaction.compact(12, "quarter", preview=True, today=TODAY)
+    assert len(report.removed_ids) == 5
+    assert report.bytes_after is None
+    assert (snapshot_ids(), _flow_sums()) == before
+
+
+@pytest.mark.parametrize("tier, kept", [("month", 4), ("quarter", 2)])
+def test_compaction_keeps_per_account_flow_sums(weekly, tier, kept):
+    sums = _flow_sums()
+    before = _disk_bytes()
+    report = compaction.compact(12, tier, preview=False, today=TODAY)
+
+    assert _flow_sums() == sums
+    assert len(report.kept_ids) == kept
+    assert len(snapshot_ids()) == kept + 2          # the two recent snapshots stay
+    after = _disk_bytes()
+    assert after < before
+    assert (report.bytes_before, report.bytes_after) == (before, after)
+    with db.get_read_session() as s:
+        assert s.exec(select(func.count()).select_from(Balance)
+                      .where(Balance.snapshot_id.in_(report.removed_ids))).one() == 0
+
+
+def test_quarter_cutoff_is_aligned_to_quarter_start():
+    assert compaction._cutoff(date(2026, 11, 15), 12, "month") == date(2025, 11, 1)
+    assert compaction._cutoff(date(2026, 11, 15), 12, "quarter") == date(2025, 10, 1)
+    assert compaction._cutoff(date(2026, 1, 15), 0, "quarter") == date(2026, 1, 1)
+
+
+def test_removed_notes_are_reported(client):
+    add_account(client, "Fund", 2, "AUD")
+    add_snapshot(client, "2024-01-05", bal_1="1", notes="first week")
+    add_snapshot(client, "2024-01-31", bal_1="1")
+    report = compaction.compact(12, "month", preview=True, today=TODAY)
+    assert (report.snapshot_notes, report.balance_notes) == (1, 0)
+
+
+@pytest.mark.parametrize("data", [{"keep_months": "-1"}, {"keep_months": "5000"}, {"tier": "year"}])
+def test_invalid_input_is_rejected(client, data):
+    resp = client.post("/settings/compact", data={"keep_months": "12", "tier": "month", **data})
+    assert resp.status_code == 303
+    assert "Keep+months+must+be" in resp.headers["location"]
+    with pytest.raises(ValueError):
+        compaction.compact(int(data.get("keep_months", 12)), data.get("tier", "month"))
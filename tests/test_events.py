@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+
+from conftest import add_account, add_snapshot, snapshot_ids
+from app.events import bus
+
+
+def _next_event(write):
+    """Run a write while subscribed to the bus and return the event it published."""
+    async def scenario():
+        queue = bus.subscribe()
+        try:
+            await asyncio.to_thread(write)
+            return await asyncio.wait_for(queue.get(), timeout=5)
+        finally:
+            bus.unsubscribe(queue)
+    return asyncio.run(scenario())
+
+
+def test_snapshot_write_publishes_point_and_summary(client):
+    add_account(client, "Bank", 1, "AUD")
+    event = _next_event(lambda: add_snapshot(client, "2025-01-31", bal_1="100"))
+    (sid,) = snapshot_ids()
+    assert event == {
+        "points": [{"id": sid, "date": "2025-01-31", "total": 100.0, "base": "AUD"}],
+        "removed": [],
+        "summary": {"current": 100.0, "delta_abs": None, "delta_pct": None, "base": "AUD"},
+    }
+
+
+def test_undeliverable_delta_becomes_reload_after_commit(client):
+    add_account(client, "Bank", 1, "USD")
+    add_snapshot(client, "2025-01-31", fx_USD="1.5", bal_1="100")
+    responses = []
+    update = {"name": "Bank", "category_id": 1, "currency_code": "EUR"}   # no EUR rate in the snapshot
+    event = _next_event(lambda: responses.append(client.post("/accounts/update/1", data=update)))
+    assert responses[0].status_code == 303
+    assert event == {"reload": True}
+    assert "EUR" in client.get("/accounts/").text
+
+
+def test_close_ends_event_stream(client):
+    def close_once_subscribed():
+        deadline = time.monotonic() + 5
+        while not bus.has_subscribers() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        bus.close()
+
+    closer = threading.Thread(target=close_once_subscribed)
+    closer.start()
+    resp = client.get("/events")
+    closer.join()
+    assert resp.status_code == 200
+    assert resp.text.startswith(": connected")
+    assert not bus.has_subscribers()
@@ -0,0 +1,22 @@
+from app import db, search
+from conftest import add_account, add_snapshot, snapshot_ids
+
+
+def _hits(client, q):
+    with db.get_read_session() as s:
+        return [(h["kind"], h["url"]) for h in search.search_notes(s, q)]
+
+
+def test_notes_are_indexed_and_unindexed_with_their_rows(client):
+    client.post("/accounts/create", data={"name": "Bank", "category_id": 1, "currency_code": "AUD",
+                                          "notes": "Joint savings"})
+    add_snapshot(client, "2025-01-31", bal_1="100", notes="after bonus savings")
+    (sid,) = snapshot_ids()
+    assert sorted(_hits(client, "sav")) == [("account", "/accounts/edit/1"), ("snapshot", f"/snapshots/{sid}/edit")]
+
+    client.post(f"/snapshots/{sid}/patch", data={"notes": "rebalanced"})
+    assert _hits(client, "bonus") == []
+    assert _hits(client, "rebal") == [("snapshot", f"/snapshots/{sid}/edit")]
+
+    client.post(f"/snapshots/{sid}/delete")
+    assert _hits(client, "rebal") == []
@@ -0,0 +1,87 @@
+from conftest import add_account, add_snapshot, snapshot_ids
+
+
+def _seed(client):
+    add_account(client, "Bank", 1, "USD")      # Liquidity
+    add_account(client, "Fund", 2, "AUD")      # Investments
+    add_snapshot(client, "2025-01-31", fx_USD="1.5", bal_1="100", bal_2="200", dep_2="10", fee_2="1")
+
+
+def test_clone_copies_fx_and_balances_without_flows(client, rows):
+    _seed(client)
+    resp = client.post("/snapshots/clone", data={"snapshot_date": "2025-02-28"})
+    src, new = snapshot_ids()
+    assert resp.headers["location"] == f"/snapshots/{new}/edit?partial=1"
+
+    fx, bal, flows = rows(new)
+    src_fx, src_bal, _ = rows(src)
+    assert fx == src_fx == {"USD": 1.5, "AUD": 1.0}
+    assert bal == src_bal
+    assert flows == {}
+
+
+def test_clone_with_flows(client, rows):
+    _seed(client)
+    client.post("/snapshots/clone", data={"snapshot_date": "2025-02-28", "include_flows": "on"})
+    src, new = snapshot_ids()
+    assert rows(new)[2] == rows(src)[2] == {2: (10.0, 0.0, 1.0, 0.0, 0.0)}
+
+
+def test_clone_without_snapshots_redirects_to_new(client):
+    resp = client.post("/snapshots/clone", data={"snapshot_date": "2025-02-28"})
+    assert resp.headers["location"] == "/snapshots/new"
+    assert snapshot_ids() == []
+
+
+def test_patch_only_touches_posted_fields(client, rows):
+    _seed(client)
+    client.post("/snapshots/clone", data={"snapshot_date": "2025-02-28", "include_flows": "on"})
+    src, new = snapshot_ids()
+
+    resp = client.post(f"/snapshots/{new}/patch", data={"bal_2": "250", "wd_2": "5", "fx_USD": "1.6"})
+    assert resp.status_code == 303
+
+    fx, bal, flows = rows(new)
+    assert fx == {"USD": 1.6, "AUD": 1.0}
+    assert bal == {1: 100.0, 2: 250.0}
+    assert flows == {2: (10.0, 5.0, 1.0, 0.0, 0.0)}   # untouched flow fields kept
+    assert rows(src) == ({"USD": 1.5, "AUD": 1.0}, {1: 100.0, 2: 200.0}, {2: (10.0, 0.0, 1.0, 0.0, 0.0)})
+
+
+def test_patch_inserts_missing_rows(client, rows):
+    _seed(client)
+    client.post("/snapshots/clone", data={"snapshot_date": "2025-02-28"})
+    _, new = snapshot_ids()
+
+    client.post(f"/snapshots/{new}/patch", data={"dep_2": "7"})
+    assert rows(new)[2] == {2: (7.0, 0.0, 0.0, 0.0, 0.0)}
+
+
+def test_clone_skips_archived_accounts(client, rows):
+    _seed(client)
+    client.post("/snapshots/clone", data={"snapshot_date": "2025-02-28", "include_flows": "on"})
+    client.post("/accounts/archive/2")
+    client.post("/snapshots/clone", data={"snapshot_date": "2025-03-31", "include_flows": "on"})
+    *_, new = snapshot_ids()
+
+    _, bal, flows = rows(new)
+    assert bal == {1: 100.0}
+    assert flows == {}
+
+
+def test_clone_rejects_bad_date(client):
+    _seed(client)
+    resp = client.post("/snapshots/clone", data={"snapshot_date": "bogus"})
+    assert resp.status_code == 303
+    assert resp.headers["location"].startswith("/snapshots/?error=")
+    assert len(snapshot_ids()) == 1
+
+
+def test_patch_rejects_bad_fx_without_writing(client, rows):
+    _seed(client)
+    src, = snapshot_ids()
+    resp = client.post(f"/snapshots/{src}/patch", data={"fx_USD": "0", "bal_1": "999"})
+    assert resp.status_code == 303
+    assert resp.headers["location"].startswith(f"/snapshots/{src}/edit?partial=1&error=")
+    assert rows(src)[1] == {1: 100.0, 2: 200.0}
+    assert "must be &gt; 0" in client.get(resp.headers["location"]).text